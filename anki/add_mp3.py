@@ -23,9 +23,11 @@ class Anki:
             f"/home/{os.getlogin()}/.local/share/Anki2/ユーザー 1/collection.media"
         )
         self.url = "http://localhost:8765"
+        # ノートごとに接続し直さないよう、AnkiConnectへの接続を使い回す
+        self.session = requests.Session()
 
     def fetch_notes(self, deck_name: str) -> list[Note]:
-        res = requests.post(
+        res = self.session.post(
             self.url,
             json={
                 "action": "findNotes",
@@ -38,20 +40,21 @@ class Anki:
 
         indexes = res["result"]
 
-        return [self._fetch_note(index) for index in indexes]
+        return self._fetch_notes(indexes)
 
     def update_field(self, note: Note, field: str, value: str):
-        res = requests.post(
-            "http://localhost:8765",
+        res = self.session.post(
+            self.url,
             json={
                 "action": "updateNoteFields",
                 "version": 6,
                 "params": {"note": {"id": note.index, "fields": {field: value}}},
             },
-        )
-        assert res.json()["error"] is None
+        ).json()
 
-        return res.json()["result"]
+        assert res["error"] is None
+
+        return res["result"]
 
     def add_sound_field(self, note: Note, file_path: str):
         shutil.move(file_path, os.path.join(self.media_path, f"{note.back}.mp3"))
@@ -61,28 +64,53 @@ class Anki:
         os.remove(os.path.join(self.media_path, note.sound))
         self.update_field(note, "音声", "")
 
-    def validate_not_nbsp(self, note: Note):
-        if "&nbsp;" in note.front:
-            self.update_field(note, "表面", note.front.replace("&nbsp;", " "))
-        if "&nbsp;" in note.back:
-            self.update_field(note, "裏面", note.back.replace("&nbsp;", " "))
-
-    def _fetch_note(self, note_id: int) -> Note:
-        res = requests.post(
+    def validate_not_nbsp(self, notes: list[Note]):
+        # 修正が必要なノートの更新をmultiでまとめ、1回のリクエストで送る
+        actions = []
+        for note in notes:
+            fields = {}
+            if "&nbsp;" in note.front:
+                fields["表面"] = note.front.replace("&nbsp;", " ")
+            if "&nbsp;" in note.back:
+                fields["裏面"] = note.back.replace("&nbsp;", " ")
+            if fields:
+                actions.append(
+                    {
+                        "action": "updateNoteFields",
+                        "version": 6,
+                        "params": {"note": {"id": note.index, "fields": fields}},
+                    }
+                )
+
+        if not actions:
+            return
+
+        res = self.session.post(
             self.url,
-            json={"action": "notesInfo", "version": 6, "params": {"notes": [note_id]}},
+            json={"action": "multi", "version": 6, "params": {"actions": actions}},
         ).json()
 
         assert res["error"] is None
+        assert all(result["error"] is None for result in res["result"])
 
-        note_info = res["result"][0]
+    def _fetch_notes(self, note_ids: list[int]) -> list[Note]:
+        # notesInfoは複数のノートをまとめて取得できるので、1回のリクエストで済ませる
+        res = self.session.post(
+            self.url,
+            json={"action": "notesInfo", "version": 6, "params": {"notes": note_ids}},
+        ).json()
 
-        return Note(
-            index=note_info["noteId"],
-            front=note_info["fields"]["表面"]["value"],
-            back=note_info["fields"]["裏面"]["value"],
-            sound=note_info["fields"]["音声"]["value"],
-        )
+        assert res["error"] is None
+
+        return [
+            Note(
+                index=note_info["noteId"],
+                front=note_info["fields"]["表面"]["value"],
+                back=note_info["fields"]["裏面"]["value"],
+                sound=note_info["fields"]["音声"]["value"],
+            )
+            for note_info in res["result"]
+        ]
 
 
 
@@ -136,8 +164,7 @@ def add_mp3(client, deck_name: str):
 
 def validate_not_nbsp(deck_name: str):
     anki = Anki()
-    for note in anki.fetch_notes(deck_name):
-        anki.validate_not_nbsp(note)
+    anki.validate_not_nbsp(anki.fetch_notes(deck_name))
 
 
 def main(deck_name: str, is_delete: bool):
@@ -1,7 +1,7 @@
 from subprocess import Popen
 import os
 import pickle
-import glob
+import sys
 import time
 
 
@@ -50,9 +50,13 @@ class MovieConverter:
 
     def update_log_file(self):
         with open(self.movie_paths_pickle_name, 'wb') as f:
-            pickle.dump(self.movie_paths, f)
+            pickle.dump(self.movie_paths, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.update_converted_log_file()
+
+    def update_converted_log_file(self):
+        # パスの一覧は変わらないので、変換のたびには進捗だけを書き出す
         with open(self.movie_converted_pickle_name, 'wb') as f:
-            pickle.dump(self.movie_converted, f)
+            pickle.dump(self.movie_converted, f, protocol=pickle.HIGHEST_PROTOCOL)
 
     def load_log_file(self):
         if os.path.exists(self.lock_file_name):
@@ -71,10 +75,48 @@ class MovieConverter:
                 f.write('You looked at me!')
 
 
+    def walk_data_folder(self, folder, suffixes, visited):
+        # 拡張子ごとにglobで走査し直さず、一度の走査でまとめて探す
+        # 読めないフォルダはglobと同じく飛ばし、探索全体は止めない
+        try:
+            st = os.stat(folder)
+            # シンボリックリンクで循環していても、同じフォルダは一度しか探さない
+            if (st.st_dev, st.st_ino) in visited:
+                return
+            visited.add((st.st_dev, st.st_ino))
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                # globと同じく、シンボリックリンクのフォルダの中も探す
+                is_dir = entry.is_dir()
+                is_movie = (
+                    not is_dir
+                    and os.path.splitext(entry.name)[1].lower() in suffixes
+                    and entry.is_file()
+                )
+            except OSError:
+                continue
+            if is_dir:
+                yield from self.walk_data_folder(entry.path, suffixes, visited)
+            elif is_movie:
+                # 通常のファイルなら、is_file()はscandirで取得済みの種別を使うので追加のstatは発生しない
+                # (シンボリックリンクや種別が取れないファイルシステムではstatが走る)
+                yield entry.path
+
     def search_data_folder(self):
-        self.movie_paths =[]
-        for from_type in self.from_file_types:
-            self.movie_paths.extend(glob.glob(self.in_folder + '/**/*.'+from_type, recursive=True))
+        # 'MOV'と'mov'のように大文字小文字が違っても同じ拡張子として扱う
+        suffixes = {'.' + from_type.lower() for from_type in self.from_file_types}
+        # 入力フォルダが無い場合は、globと同じく見つからなかったものとして扱う
+        if os.path.isdir(self.in_folder):
+            self.movie_paths = list(self.walk_data_folder(self.in_folder, suffixes, set()))
+        else:
+            self.movie_paths = []
 
         print('found these files')
         for file_path in self.movie_paths:
@@ -84,33 +126,38 @@ class MovieConverter:
         return self.out_folder + from_path.split('.')[0].removeprefix(self.in_folder) + '.' + self.to_file_type
 
 
-    def create_command(self, from_path):
+    def create_command(self, from_path, to_path):
         command = 'ffmpeg -i "' + from_path + '"'
         for conf in configurations:
             command += ' ' + conf
-        command += ' "' + self.create_to_path(from_path) + '"'
+        command += ' "' + to_path + '"'
         return command
 
-    def ffmpeg(self, path):
-        command = self.create_command(path)
+    def ffmpeg(self, from_path, to_path):
+        # 出力先のパスはrun()で作ったものを使い回す
+        command = self.create_command(from_path, to_path)
         print('command', command)
         popen = Popen(command)
-        popen.wait()
+        return popen.wait()
 
 
     def run(self):
         self.load_log_file()
-        self.search_data_folder()
 
         if self.log_movie_paths is not None:
+            # 再開時はログのパスを使うので、フォルダを探索し直さない
             print('cotinue restored working')
             self.movie_paths = self.log_movie_paths
             self.movie_converted = self.log_movie_converted
             self.movie_converted.extend([False for _ in range(len(self.movie_paths) - len(self.movie_converted))])
         else:
             print('start new task')
+            self.search_data_folder()
             self.movie_converted = [False for _ in self.movie_paths]
 
+        self.update_log_file()
+
+        failed_paths = []
         for i in range(len(self.movie_paths)):
             from_path = self.movie_paths[i]
             to_path = self.create_to_path(from_path)
@@ -129,17 +176,32 @@ class MovieConverter:
             os.makedirs(to_path.removesuffix(os.path.basename(to_path)), exist_ok=True)
 
             time.sleep(1)
-            self.ffmpeg(from_path)
+            # 失敗しても残りのファイルの変換は続け、次回の再開時にやり直す
+            if self.ffmpeg(from_path, to_path) != 0:
+                print('failed ' + from_path)
+                failed_paths.append(from_path)
+                continue
             self.movie_converted[i] = True
 
-            self.update_log_file()
+            self.update_converted_log_file()
+
+        if failed_paths:
+            print('failed to convert these files')
+            for file_path in failed_paths:
+                print(file_path)
+            print('keeping lock file to retry them on the next run')
+            return failed_paths
 
         print('all done')
         os.remove(self.lock_file_name)
+        return failed_paths
 
 def main():
     converter =  MovieConverter()
-    converter.run()
+    failed_paths = converter.run()
+    # 一部でも失敗した場合は、呼び出し元が分かるように終了コードを1にする
+    if failed_paths:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
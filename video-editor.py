@@ -95,11 +95,10 @@ class VideoEditor:
         # 保存先Video
         new_video = Video(name)
 
+        # 連結するファイルの一覧をまとめて書き込む
+        lines = [f"file {self.video_list[int(i)].path}\n" for i in index]
         with open("temp.txt", "w") as f:
-            for i in index:
-                f.write("file ")
-                f.write(self.video_list[int(i)].path)
-                f.write("\n")
+            f.write("".join(lines))
         command = f"ffmpeg -f concat -i temp.txt -c copy {new_video.path}"
         proc = Popen(command, shell=True, stdout=PIPE, stderr=PIPE, text=True)
         result = proc.communicate()